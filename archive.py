@@ -0,0 +1,148 @@
+import gzip
+import json
+import zlib
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Lock
+
+__all__ = ["ArchiveWriter", "ArchiveReader"]
+
+_NEVER = datetime.min.replace(tzinfo=timezone.utc)
+_GZIP_MAGIC = b"\x1f\x8b\x08"
+READ_SIZE = 1 << 20
+
+
+class ArchiveWriter(object):
+    __slots__ = ("path", "member_size", "_file", "_written", "_lock")
+
+    def __init__(self, path: str | Path, member_size: int = 1000) -> None:
+        # every `member_size` records the gzip member is closed, so a killed run loses at most that many
+        self.path = Path(path)
+        self.member_size = member_size
+        self._file = None
+        self._written = 0
+        self._lock = Lock()
+
+    def __enter__(self) -> "ArchiveWriter":
+        self.open()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def open(self) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(self.path, "at", encoding="utf-8")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def write(self, kind: str, key: str, updated: str | None, payload: dict) -> None:
+        line = json.dumps({"kind": kind, "key": key, "updated": updated, "payload": payload}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._written += 1
+            if self._written >= self.member_size:
+                self._file.close()
+                self._file = gzip.open(self.path, "at", encoding="utf-8")
+                self._written = 0
+
+    def write_issue(self, issue_data: dict) -> None:
+        self.write(
+            kind="issue",
+            key=issue_data.get("key"),
+            updated=(issue_data.get("fields") or {}).get("updated"),
+            payload=issue_data
+        )
+
+    def write_worklogs(self, worklogs: list[dict]) -> None:
+        for worklog in worklogs:
+            self.write(kind="worklog", key=str(worklog.get("id")), updated=worklog.get("updated"), payload=worklog)
+
+
+class ArchiveReader(object):
+    __slots__ = ("path",)
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    def _lines(self) -> Iterator[bytes]:
+        # members are decoded one by one so a truncated or corrupt one (a killed run) is skipped up to the next
+        # gzip header instead of hiding everything appended after it
+        with open(self.path, "rb") as file:
+            start = 0
+            while start is not None:
+                file.seek(start)
+                position, tail = start, b""
+                decompressor = zlib.decompressobj(wbits=31)
+                try:
+                    while data := file.read(READ_SIZE):
+                        position += len(data)
+                        while data:
+                            tail += decompressor.decompress(data)
+                            *lines, tail = tail.split(b"\n")
+                            yield from lines
+                            if not decompressor.eof:
+                                break
+                            data = decompressor.unused_data
+                            start = position - len(data)
+                            decompressor = zlib.decompressobj(wbits=31)
+                except zlib.error as e:
+                    print(f"{self.path}: skipping corrupt gzip member at byte {start}: {e}")
+                    start = self._next_member(file=file, offset=start + 1)
+                    continue
+                if position > start:
+                    print(f"{self.path}: ignoring truncated gzip member at byte {start}")
+                start = None
+
+    @staticmethod
+    def _next_member(file, offset: int) -> int | None:
+        file.seek(offset)
+        previous = b""
+        while data := file.read(READ_SIZE):
+            found = (previous + data).find(_GZIP_MAGIC)
+            if found != -1:
+                return offset - len(previous) + found
+            offset += len(data)
+            previous = data[-(len(_GZIP_MAGIC) - 1):]
+        return None
+
+    def _records(self) -> Iterator[dict]:
+        for line in self._lines():
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                print(f"{self.path}: skipping unreadable record")
+
+    @staticmethod
+    def _updated(record: dict) -> datetime:
+        # Jira stamps carry the author's offset, so strings from different timezones do not sort lexically
+        if not record.get("updated"):
+            return _NEVER
+        updated = datetime.fromisoformat(record.get("updated"))
+        return updated if updated.tzinfo else updated.replace(tzinfo=timezone.utc)
+
+    def index(self, kind: str) -> dict[str, tuple[datetime, int]]:
+        # key -> (updated, line number) of the most recent record, so replay only keeps the latest payload
+        index = {}
+        for line_number, record in enumerate(self._records()):
+            if record.get("kind") != kind:
+                continue
+            updated = self._updated(record=record)
+            current = index.get(record.get("key"))
+            if current is None or updated >= current[0]:
+                index[record.get("key")] = (updated, line_number)
+        return index
+
+    def latest(self, kind: str) -> Iterator[dict]:
+        line_numbers = {line_number for _, line_number in self.index(kind=kind).values()}
+        for line_number, record in enumerate(self._records()):
+            if line_number in line_numbers:
+                yield record.get("payload")
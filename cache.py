@@ -0,0 +1,101 @@
+import json
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from typing import Any
+
+__all__ = ["LRUCache", "RedisCache", "get_cache"]
+
+
+class LRUCache(object):
+    __slots__ = ("max_size", "ttl", "_entries", "_lock")
+
+    def __init__(self, max_size: int = 4096, ttl: float = 300.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def get_many(self, keys: list[str]) -> dict[str, Any]:
+        values = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def set_many(self, values: dict[str, Any], ttl: float | None = None) -> None:
+        for key, value in values.items():
+            self.set(key=key, value=value, ttl=ttl)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class RedisCache(object):
+    __slots__ = ("ttl", "prefix", "_client")
+
+    def __init__(self, url: str, ttl: float = 300.0, prefix: str = "jira_parser:") -> None:
+        try:
+            from redis import Redis
+        except ImportError as e:
+            raise ImportError("CACHE_URL is set but the `redis` package is not installed") from e
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = Redis.from_url(url)
+
+    def get(self, key: str) -> Any | None:
+        value = self._client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def get_many(self, keys: list[str]) -> dict[str, Any]:
+        if not keys:
+            return {}
+        values = self._client.mget([self.prefix + key for key in keys])
+        return {key: json.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        self._client.set(self.prefix + key, json.dumps(value), ex=int(ttl or self.ttl))
+
+    def set_many(self, values: dict[str, Any], ttl: float | None = None) -> None:
+        pipeline = self._client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipeline.set(self.prefix + key, json.dumps(value), ex=int(ttl or self.ttl))
+        pipeline.execute()
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self._client.delete(*[self.prefix + key for key in keys])
+
+
+@lru_cache
+def get_cache() -> LRUCache | RedisCache:
+    from settings import get_settings
+
+    settings = get_settings()
+    if settings.CACHE_URL:
+        return RedisCache(url=settings.CACHE_URL, ttl=settings.CACHE_TTL)
+    # write-driven invalidation only reaches other processes through Redis; an in-process cache only sees the
+    # invalidations of its own writes, so it relies on a short TTL to bound staleness instead
+    return LRUCache(max_size=settings.CACHE_SIZE, ttl=min(settings.CACHE_TTL, settings.CACHE_LOCAL_TTL))
@@ -0,0 +1,241 @@
+import argparse
+import json
+from collections.abc import Iterable
+from contextlib import nullcontext
+from datetime import date
+
+__all__ = ["build_parser", "main"]
+
+
+def _add_common_arguments(
+        parser: argparse.ArgumentParser,
+        input_path: bool = False,
+        since: bool = False,
+        record: bool = False,
+        not_found: bool = False,
+        dimensions: bool = True
+) -> None:
+    # only commands that honor a flag get it, so a misplaced one fails in argparse instead of being ignored
+    parser.add_argument("-c", "--concurrency", type=int, default=None, help="parallel Jira requests / DB sessions")
+    parser.add_argument("-b", "--batch-size", type=int, default=None, help="rows per DB insert and keys per chunk")
+    if since:
+        parser.add_argument(
+            "-s", "--since", type=date.fromisoformat, default=None, help="only items updated since date"
+        )
+    if input_path:
+        parser.add_argument("-i", "--input", dest="input_path", default=None, help="csvjson export with issue keys")
+    if not_found:
+        parser.add_argument("--not-found", default=None, help="write keys missing in Jira to this json file")
+    if dimensions:
+        parser.add_argument("--skip-dimensions", action="store_true", help="do not sync projects and users first")
+    if record:
+        parser.add_argument("-r", "--record", default=None, help="append raw Jira payloads to this .jsonl.gz archive")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="jira_parser", description="Jira to Postgres sync")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    issues_parser = subparsers.add_parser("issues", help="sync issues without worklogs")
+    _add_common_arguments(issues_parser, input_path=True, since=True, record=True, not_found=True)
+
+    worklogs_parser = subparsers.add_parser("worklogs", help="sync worklogs of known issues")
+    _add_common_arguments(worklogs_parser, input_path=True, since=True, record=True)
+
+    backfill_parser = subparsers.add_parser("backfill", help="sync issues together with their worklogs")
+    _add_common_arguments(backfill_parser, input_path=True, since=True, record=True, not_found=True)
+
+    users_parser = subparsers.add_parser("users", help="insert users from a json file")
+    _add_common_arguments(users_parser, input_path=True, dimensions=False)
+
+    replay_parser = subparsers.add_parser("replay", help="re-ingest a recorded archive without calling Jira")
+    _add_common_arguments(replay_parser, input_path=True, dimensions=False)
+
+    retry_parser = subparsers.add_parser("retry", help="reprocess dead-lettered issues and worklogs")
+    _add_common_arguments(retry_parser)
+    retry_parser.add_argument(
+        "--stage",
+        action="append",
+        choices=["FETCH", "ISSUE", "WORKLOG"],
+        default=None,
+        help="only retry these stages (repeatable)"
+    )
+
+    dimensions_parser = subparsers.add_parser("dimensions", help="sync projects and report Jira users missing in db")
+    _add_common_arguments(dimensions_parser, dimensions=False)
+
+    webhook_parser = subparsers.add_parser("webhook", help="receive Jira webhooks and sync affected issues")
+    _add_common_arguments(webhook_parser)
+    webhook_parser.add_argument("--window", type=float, default=None, help="seconds to coalesce events per issue")
+
+    schedule_parser = subparsers.add_parser("schedule", help="keep syncing active projects at adaptive intervals")
+    _add_common_arguments(schedule_parser, since=True)
+    schedule_parser.add_argument("--min-interval", type=float, default=None, help="fastest per-project cadence, s")
+    schedule_parser.add_argument("--max-interval", type=float, default=None, help="slowest per-project cadence, s")
+    schedule_parser.add_argument("--max-projects", type=int, default=None, help="concurrent project syncs")
+
+    return parser
+
+
+def _issue_keys(args: argparse.Namespace, client, batch_size: int) -> Iterable[str]:
+    from sync import keys_from_json, search_issue_keys
+
+    if args.input_path:
+        return keys_from_json(args.input_path)
+    return search_issue_keys(client=client, since=args.since, batch_size=batch_size)
+
+
+def _check_arguments(args: argparse.Namespace) -> None:
+    # runs before any connection is made, so a bad command line fails without touching the DB or Jira
+    if args.command in ("users", "replay") and not args.input_path:
+        raise SystemExit(f"{args.command}: --input is required")
+    # an unbounded JQL search is rejected by /search/jql, so keys must come from a file or a date
+    if args.command in ("issues", "worklogs", "backfill") and not args.input_path and args.since is None:
+        raise SystemExit(f"{args.command}: either --input or --since is required")
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    _check_arguments(args=args)
+
+    # heavy imports and connections are deferred until a command actually needs them
+    import sync
+    from archive import ArchiveWriter
+    from dead_letter import ensure_dead_letter_table
+    from dimensions import sync_dimensions
+    from enums import DeadLetterStage
+    from key_index import KeyIndex
+    from settings import get_settings, get_engine, get_session_maker, get_jira_client
+
+    settings = get_settings()
+    concurrency = args.concurrency or settings.CONCURRENCY
+    batch_size = args.batch_size or settings.BATCH_SIZE
+    session_maker = get_session_maker(concurrency=concurrency)
+
+    if args.command == "users":
+        sync.add_users_in_db(
+            session_maker=session_maker,
+            users=sync.data_from_json(args.input_path),
+            batch_size=batch_size
+        )
+        return
+
+    if args.command != "dimensions":
+        ensure_dead_letter_table(engine=get_engine(concurrency=concurrency))
+
+    index = KeyIndex.load(session_maker=session_maker)
+
+    if args.command == "replay":
+        sync.replay_archive(session_maker=session_maker, path=args.input_path, index=index, batch_size=batch_size)
+        return
+
+    client = get_jira_client(concurrency=concurrency)
+    if args.command == "dimensions" or not args.skip_dimensions:
+        sync_dimensions(client=client, session_maker=session_maker, index=index, batch_size=batch_size)
+    if args.command == "dimensions":
+        return
+
+    if args.command == "retry":
+        sync.retry_dead_letters(
+            client=client,
+            session_maker=session_maker,
+            index=index,
+            stages=[DeadLetterStage(stage) for stage in args.stage] if args.stage else None,
+            batch_size=batch_size
+        )
+        return
+
+    if args.command == "webhook":
+        from webhook import serve
+
+        serve(
+            client=client,
+            session_maker=session_maker,
+            index=index,
+            host=settings.HOST,
+            port=settings.PORT,
+            window=args.window or settings.WEBHOOK_WINDOW,
+            workers=args.concurrency or settings.WORKERS,
+            batch_size=batch_size,
+            secret=settings.WEBHOOK_SECRET.get_secret_value() if settings.WEBHOOK_SECRET else None
+        )
+        return
+
+    if args.command == "schedule":
+        from scheduler import Scheduler
+
+        Scheduler(
+            client=client,
+            session_maker=session_maker,
+            index=index,
+            min_interval=args.min_interval or settings.SCHEDULER_MIN_INTERVAL,
+            max_interval=args.max_interval or settings.SCHEDULER_MAX_INTERVAL,
+            jitter=settings.SCHEDULER_JITTER,
+            max_projects=args.max_projects or settings.SCHEDULER_MAX_PROJECTS,
+            target_changes=settings.SCHEDULER_TARGET_CHANGES,
+            concurrency=concurrency,
+            batch_size=batch_size
+        ).run_forever(since=args.since)
+        return
+
+    with ArchiveWriter(path=args.record) if args.record else nullcontext() as archive:
+        _run_sync(
+            args=args,
+            client=client,
+            session_maker=session_maker,
+            index=index,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            archive=archive
+        )
+
+
+def _run_sync(
+        args: argparse.Namespace,
+        client,
+        session_maker,
+        index,
+        concurrency: int,
+        batch_size: int,
+        archive
+) -> None:
+    import sync
+
+    if args.command == "worklogs" and not args.input_path:
+        sync.sync_updated_worklogs(
+            client=client,
+            session_maker=session_maker,
+            since=args.since,
+            index=index,
+            batch_size=batch_size,
+            archive=archive
+        )
+    elif args.command == "worklogs":
+        sync.sync_worklogs(
+            client=client,
+            session_maker=session_maker,
+            keys=_issue_keys(args=args, client=client, batch_size=batch_size),
+            index=index,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            archive=archive
+        )
+    else:
+        not_found = sync.sync_issues(
+            client=client,
+            session_maker=session_maker,
+            keys=_issue_keys(args=args, client=client, batch_size=batch_size),
+            index=index,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            with_worklogs=args.command == "backfill",
+            archive=archive
+        )
+        if args.not_found and not_found:
+            with open(args.not_found, "w", encoding="utf-8") as file:
+                json.dump(not_found, file, ensure_ascii=False, indent=2)
+    print(f"Jira connections: {client.stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+from collections.abc import Iterator
+
+from sqlalchemy import Engine, Row, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from enums import DeadLetterStage
+from models import DeadLetter
+
+__all__ = [
+    "ensure_dead_letter_table",
+    "record_dead_letter",
+    "resolve_dead_letters",
+    "iter_dead_letters",
+]
+
+ERROR_MAX_LENGTH = 4000
+
+
+def ensure_dead_letter_table(engine: Engine) -> None:
+    DeadLetter.__table__.create(bind=engine, checkfirst=True)
+
+
+def record_dead_letter(session: Session, stage: DeadLetterStage, key: str, payload: dict, error: Exception) -> None:
+    print(f"{stage} {key} failed: {error}")
+    session.rollback()
+    values = {
+        "stage": stage,
+        "key": str(key),
+        "payload": payload,
+        "error_class": type(error).__name__,
+        "error": str(error)[:ERROR_MAX_LENGTH]
+    }
+    try:
+        session.execute(
+            insert(DeadLetter).values(values).on_conflict_do_update(
+                constraint="dead_letters_stage_key",
+                set_={
+                    "payload": values["payload"],
+                    "error_class": values["error_class"],
+                    "error": values["error"],
+                    "attempts": DeadLetter.attempts + 1,
+                    "updated_at": func.now()
+                }
+            )
+        )
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(e)
+
+
+def resolve_dead_letters(session: Session, ids: list[int]) -> None:
+    if ids:
+        session.execute(delete(DeadLetter).where(DeadLetter.id.in_(ids)))
+        session.commit()
+
+
+def iter_dead_letters(
+        session: Session,
+        stage: DeadLetterStage,
+        batch_size: int = 100
+) -> Iterator[list[Row]]:
+    last_id = 0
+    while True:
+        dead_letters = session.execute(
+            statement=select(DeadLetter.id, DeadLetter.key, DeadLetter.payload).filter(
+                DeadLetter.stage == stage,
+                DeadLetter.id > last_id
+            ).order_by(DeadLetter.id).limit(batch_size)
+        ).all()
+        if not dead_letters:
+            break
+        last_id = dead_letters[-1].id
+        yield dead_letters
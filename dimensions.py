@@ -0,0 +1,97 @@
+from collections.abc import Iterator
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from jira_client import JiraClient
+from key_index import KeyIndex
+from models import Project
+from utils import change_to_valid_email
+
+__all__ = [
+    "fetch_projects",
+    "fetch_users",
+    "sync_projects",
+    "sync_users",
+    "sync_dimensions",
+    "refresh_dimensions",
+]
+
+
+def fetch_projects(client: JiraClient, batch_size: int = 50) -> Iterator[list[dict]]:
+    params = {"startAt": 0, "maxResults": batch_size}
+    while True:
+        response = client.request(method="GET", url="/rest/api/3/project/search", params=params)
+        response.raise_for_status()
+        data = response.json()
+        if data.get("values"):
+            yield data.get("values")
+        if data.get("isLast", True):
+            break
+        params["startAt"] += len(data.get("values", []))
+
+
+def fetch_users(client: JiraClient, batch_size: int = 1000) -> Iterator[list[dict]]:
+    params = {"startAt": 0, "maxResults": batch_size}
+    while True:
+        response = client.request(method="GET", url="/rest/api/3/users/search", params=params)
+        response.raise_for_status()
+        users = response.json()
+        if not users:
+            break
+        yield users
+        params["startAt"] += len(users)
+
+
+def sync_projects(client: JiraClient, session_maker: sessionmaker, index: KeyIndex, batch_size: int = 50) -> int:
+    inserted = 0
+    with session_maker() as session:  # type: Session
+        for projects in fetch_projects(client=client, batch_size=batch_size):
+            values = [
+                {"id": int(project.get("id")), "key": project.get("key"), "name": project.get("name")}
+                for project in projects
+                if int(project.get("id")) not in index.project_ids
+                and len(project.get("key") or "") >= 2 and len(project.get("name") or "") >= 2
+            ]
+            if values:
+                try:
+                    project_ids = session.scalars(
+                        insert(Project).values(values).on_conflict_do_nothing().returning(Project.id)
+                    ).all()
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    print(e)
+                    continue
+                inserted += len(project_ids)
+                index.project_ids.update(project_ids)
+    print(f"Projects inserted successful: {inserted}")
+    return inserted
+
+
+def sync_users(client: JiraClient, index: KeyIndex, batch_size: int = 1000) -> list[str]:
+    # report only: users rows need a telegram_id and position that only the bot onboarding knows, so they cannot
+    # be created here; lists active Jira users whose normalized email has no db user, whose issues and worklogs
+    # would otherwise dead-letter
+    missing = []
+    for users in fetch_users(client=client, batch_size=batch_size):
+        for user in users:
+            if user.get("accountType") != "atlassian" or not user.get("active", True):
+                continue
+            email = change_to_valid_email(data={"author": user})
+            if email and email not in index.users:
+                missing.append(email)
+    if missing:
+        print(f"Jira users missing in db: {len(missing)} {missing}")
+    return missing
+
+
+def sync_dimensions(client: JiraClient, session_maker: sessionmaker, index: KeyIndex, batch_size: int = 100) -> None:
+    sync_projects(client=client, session_maker=session_maker, index=index, batch_size=min(batch_size, 50))
+    sync_users(client=client, index=index)
+
+
+def refresh_dimensions(client: JiraClient, session_maker: sessionmaker, index: KeyIndex, batch_size: int = 100) -> None:
+    # for long-running daemons: picks up users and projects created since startup so their events stop dead-lettering
+    index.reload_dimensions(session_maker=session_maker)
+    sync_projects(client=client, session_maker=session_maker, index=index, batch_size=min(batch_size, 50))
@@ -1,11 +1,13 @@
 from enums.roles import *
 from enums.issue import *
 from enums.calendar_type import *
+from enums.dead_letter import *
 
 __all__ = [
     "UserRole",
     "CalendarType",
     "IssueStatus",
     "IssueType",
-    "IssuePriority"
+    "IssuePriority",
+    "DeadLetterStage"
 ]
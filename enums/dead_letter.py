@@ -0,0 +1,9 @@
+from enum import StrEnum
+
+__all__ = ["DeadLetterStage"]
+
+
+class DeadLetterStage(StrEnum):
+    FETCH = "FETCH"
+    ISSUE = "ISSUE"
+    WORKLOG = "WORKLOG"
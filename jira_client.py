@@ -1,19 +1,66 @@
-from httpx import Client, Response
+from threading import Lock
+
+from httpx import Client, Limits, Response, Timeout
 
 
 class JiraClient(object):
-    __slots__ = ("base_url", "email", "token", "client", "app")
+    __slots__ = (
+        "base_url",
+        "email",
+        "token",
+        "client",
+        "app",
+        "_stats",
+        "_stats_lock",
+    )
 
-    def __init__(self, base_url: str, email: str, token: str) -> None:
+    def __init__(
+            self,
+            base_url: str,
+            email: str,
+            token: str,
+            concurrency: int = 8,
+            http2: bool = False,
+            keepalive_expiry: float = 30.0,
+            connect_timeout: float = 10.0,
+            read_timeout: float = 60.0,
+    ) -> None:
         self.base_url = base_url
         self.email = email
         self.token = token
+        self._stats = {"requests": 0, "connections": 0, "tls_handshakes": 0}
+        self._stats_lock = Lock()
         self.client = Client(
             base_url=self.base_url,
             auth=(self.email, self.token),
-            headers={"Content-Type": "application/json"},
+            # Accept-Encoding is left to httpx, which only offers br/zstd when their decoders are installed
+            headers={"Accept": "application/json"},
+            http2=http2,
+            limits=Limits(
+                max_connections=concurrency,
+                max_keepalive_connections=concurrency,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=Timeout(timeout=read_timeout, connect=connect_timeout),
         )
 
+    def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self._increment(name="connections")
+        elif event_name == "connection.start_tls.complete":
+            self._increment(name="tls_handshakes")
+
+    def _increment(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    @property
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["reused"] = max(stats["requests"] - stats["connections"], 0)
+        return stats
+
     def request(
             self,
             method: str,
@@ -21,4 +68,11 @@ class JiraClient(object):
             params: dict = None,
             json: dict = None,
     ) -> Response:
-        return self.client.request(method=method, url=url, params=params, json=json)
\ No newline at end of file
+        self._increment(name="requests")
+        return self.client.request(
+            method=method,
+            url=url,
+            params=params,
+            json=json,
+            extensions={"trace": self._trace}
+        )
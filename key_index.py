@@ -0,0 +1,98 @@
+from threading import Lock
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from models import Project, User, Worklog
+
+__all__ = ["IdBitmap", "KeyIndex"]
+
+LOAD_BATCH_SIZE = 50_000
+
+
+class IdBitmap(object):
+    __slots__ = ("base", "_bits", "_outliers", "_lock")
+
+    def __init__(self, base: int = 0) -> None:
+        # ids are dense and large, so one bit per id above `base` keeps millions of them in a few MB
+        self.base = base
+        self._bits = bytearray()
+        self._outliers = set()
+        self._lock = Lock()
+
+    def __contains__(self, item: int) -> bool:
+        offset = item - self.base
+        if offset < 0:
+            return item in self._outliers
+        byte = offset >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (offset & 7)))
+
+    def __len__(self) -> int:
+        return sum(byte.bit_count() for byte in self._bits) + len(self._outliers)
+
+    def add(self, item: int) -> None:
+        offset = item - self.base
+        with self._lock:
+            if offset < 0:
+                self._outliers.add(item)
+                return
+            byte = offset >> 3
+            if byte >= len(self._bits):
+                self._bits.extend(bytes(max(byte + 1 - len(self._bits), len(self._bits) // 2)))
+            self._bits[byte] |= 1 << (offset & 7)
+
+    def discard(self, item: int) -> None:
+        offset = item - self.base
+        with self._lock:
+            if offset < 0:
+                self._outliers.discard(item)
+                return
+            byte = offset >> 3
+            if byte < len(self._bits):
+                self._bits[byte] &= ~(1 << (offset & 7)) & 0xFF
+
+    def update(self, items) -> None:
+        for item in items:
+            self.add(item)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+class KeyIndex(object):
+    __slots__ = ("worklog_ids", "users", "project_ids")
+
+    def __init__(
+            self,
+            worklog_ids: IdBitmap,
+            users: dict[str, int] | None = None,
+            project_ids: set[int] | None = None
+    ) -> None:
+        # issues are upserted on id, so only worklogs need an existence check before they are written
+        self.worklog_ids = worklog_ids
+        self.users = users if users is not None else {}
+        self.project_ids = project_ids if project_ids is not None else set()
+
+    @classmethod
+    def load(cls, session_maker: sessionmaker) -> "KeyIndex":
+        with session_maker() as session:  # type: Session
+            worklog_ids = IdBitmap(base=session.scalar(statement=select(Worklog.id).order_by(Worklog.id).limit(1)) or 0)
+            worklog_ids.update(session.scalars(
+                statement=select(Worklog.id).execution_options(yield_per=LOAD_BATCH_SIZE)
+            ))
+        index = cls(worklog_ids=worklog_ids)
+        index.reload_dimensions(session_maker=session_maker)
+        print(
+            f"Key index loaded: {len(worklog_ids)} worklogs ({worklog_ids.nbytes} bytes), "
+            f"{len(index.users)} users, {len(index.project_ids)} projects"
+        )
+        return index
+
+    def reload_dimensions(self, session_maker: sessionmaker) -> None:
+        # users and projects are small and change outside the sync, so long-running daemons re-read them whole
+        with session_maker() as session:  # type: Session
+            users = {email: user_id for email, user_id in session.execute(statement=select(User.email, User.id))}
+            project_ids = set(session.scalars(statement=select(Project.id)).all())
+        self.users = users
+        self.project_ids = project_ids
@@ -11,11 +11,13 @@ from sqlalchemy import (
     text,
     BIGINT,
     BOOLEAN, DateTime,
+    UniqueConstraint,
+    func,
 )
-from sqlalchemy.dialects.postgresql import INTERVAL
+from sqlalchemy.dialects.postgresql import INTERVAL, JSONB
 from sqlalchemy.orm import DeclarativeBase, relationship
 
-from enums import IssueStatus, IssueType, IssuePriority, UserRole, CalendarType
+from enums import IssueStatus, IssueType, IssuePriority, UserRole, CalendarType, DeadLetterStage
 
 __all__ = [
     "Base",
@@ -30,7 +32,8 @@ __all__ = [
     "UserProjectLoad",
     "EmploymentCalendar",
     "Worklog",
-    "IssueStatusLog"
+    "IssueStatusLog",
+    "DeadLetter"
 ]
 
 
@@ -405,3 +408,23 @@ class UserProjectLoad(Base):
         viewonly=True,
         uselist=False
     )
+
+
+class DeadLetter(Base):
+    __tablename__ = "dead_letters"
+    __table_args__ = (
+        UniqueConstraint("stage", "key", name="dead_letters_stage_key"),
+    )
+
+    id = Column(BIGINT, primary_key=True, autoincrement=True)
+    stage = Column(Enum(DeadLetterStage), nullable=False, index=True)
+    key = Column(VARCHAR(length=128), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    error_class = Column(VARCHAR(length=128), nullable=False)
+    error = Column(VARCHAR, nullable=True)
+    attempts = Column(SMALLINT, default=1, nullable=False, server_default="1")
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __str__(self):
+        return f"{self.stage}:{self.key}"
@@ -0,0 +1,138 @@
+from collections.abc import Iterable
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from cache import get_cache
+from enums import IssueStatus
+from models import Issue, Worklog
+
+__all__ = [
+    "get_user_hours_by_day",
+    "get_user_week_hours",
+    "get_user_month_hours",
+    "get_user_open_issues",
+    "get_issue",
+    "invalidate_user_days",
+    "invalidate_issues",
+]
+
+CLOSED_STATUSES = (IssueStatus.DONE, IssueStatus.CANCELED)
+
+
+def _hours_key(user_id: int, day: date) -> str:
+    return f"hours:{user_id}:{day.isoformat()}"
+
+
+def _open_issues_key(user_id: int) -> str:
+    return f"open_issues:{user_id}"
+
+
+def _issue_key(issue_id: int) -> str:
+    return f"issue:{issue_id}"
+
+
+def _issue_row(issue: Issue) -> dict:
+    return {
+        "id": issue.id,
+        "key": issue.key,
+        "name": issue.name,
+        "status": str(issue.status),
+        "priority": str(issue.priority),
+        "end_date": issue.end_date.isoformat() if issue.end_date else None,
+        "project_id": issue.project_id,
+    }
+
+
+def get_user_hours_by_day(session_maker: sessionmaker, user_id: int, start: date, end: date) -> dict[date, timedelta]:
+    # cached per (user, day) so a worklog write invalidates exactly one entry instead of every range containing it
+    cache = get_cache()
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    cached = cache.get_many([_hours_key(user_id=user_id, day=day) for day in days])
+    hours = {
+        day: timedelta(seconds=cached[_hours_key(user_id=user_id, day=day)])
+        for day in days if _hours_key(user_id=user_id, day=day) in cached
+    }
+    missing = [day for day in days if day not in hours]
+    if missing:
+        with session_maker() as session:  # type: Session
+            rows = session.execute(
+                statement=select(Worklog.date_created, func.sum(Worklog.hour)).filter(
+                    Worklog.user_id == user_id,
+                    Worklog.date_created >= min(missing),
+                    Worklog.date_created <= max(missing)
+                ).group_by(Worklog.date_created)
+            ).all()
+        totals = {day: hour for day, hour in rows}
+        fresh = {day: totals.get(day) or timedelta() for day in missing}
+        cache.set_many({_hours_key(user_id=user_id, day=day): hour.total_seconds() for day, hour in fresh.items()})
+        hours.update(fresh)
+    return hours
+
+
+def get_user_week_hours(session_maker: sessionmaker, user_id: int, today: date | None = None) -> timedelta:
+    today = today or date.today()
+    start = today - timedelta(days=today.weekday())
+    hours = get_user_hours_by_day(session_maker=session_maker, user_id=user_id, start=start, end=today)
+    return sum(hours.values(), timedelta())
+
+
+def get_user_month_hours(session_maker: sessionmaker, user_id: int, today: date | None = None) -> timedelta:
+    today = today or date.today()
+    hours = get_user_hours_by_day(session_maker=session_maker, user_id=user_id, start=today.replace(day=1), end=today)
+    return sum(hours.values(), timedelta())
+
+
+def get_user_open_issues(session_maker: sessionmaker, user_id: int) -> list[dict]:
+    cache = get_cache()
+    issues = cache.get(_open_issues_key(user_id=user_id))
+    if issues is not None:
+        return issues
+    with session_maker() as session:  # type: Session
+        issues = [
+            _issue_row(issue=issue) for issue in session.scalars(
+                statement=select(Issue).filter(
+                    Issue.developer_id == user_id,
+                    Issue.status.not_in(CLOSED_STATUSES)
+                ).order_by(Issue.priority.desc(), Issue.id)
+            ).all()
+        ]
+    cache.set(_open_issues_key(user_id=user_id), issues)
+    return issues
+
+
+def get_issue(session_maker: sessionmaker, issue_id: int) -> dict | None:
+    cache = get_cache()
+    issue = cache.get(_issue_key(issue_id=issue_id))
+    if issue is not None:
+        return issue
+    with session_maker() as session:  # type: Session
+        issue = session.get(Issue, issue_id)
+        if issue is None:
+            return None
+        issue = _issue_row(issue=issue)
+    cache.set(_issue_key(issue_id=issue_id), issue)
+    return issue
+
+
+def invalidate_user_days(user_days: Iterable[tuple[int, date]]) -> None:
+    keys = {_hours_key(user_id=user_id, day=day) for user_id, day in user_days if user_id is not None}
+    _delete(keys=keys)
+
+
+def invalidate_issues(issue_ids: Iterable[int], developer_ids: Iterable[int | None] = ()) -> None:
+    keys = {_issue_key(issue_id=issue_id) for issue_id in issue_ids}
+    keys |= {_open_issues_key(user_id=user_id) for user_id in developer_ids if user_id is not None}
+    _delete(keys=keys)
+
+
+def _delete(keys: set[str]) -> None:
+    # only a shared (CACHE_URL) cache lets the sync's invalidations reach readers in other processes;
+    # a cache outage must never fail the sync that triggered the invalidation; entries still expire by TTL
+    if not keys:
+        return
+    try:
+        get_cache().delete(*keys)
+    except Exception as e:
+        print(e)
@@ -0,0 +1,187 @@
+import math
+import random
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from dimensions import refresh_dimensions
+from jira_client import JiraClient
+from key_index import KeyIndex
+from models import Project
+from sync import search_issue_keys, sync_issues
+
+__all__ = ["ProjectSchedule", "Scheduler"]
+
+TICK_SECONDS = 1.0
+
+
+class ProjectSchedule(object):
+    __slots__ = ("project_id", "interval", "next_run", "synced_at", "rate")
+
+    def __init__(self, project_id: int, interval: float, synced_at: float, next_run: float) -> None:
+        self.project_id = project_id
+        self.interval = interval
+        self.next_run = next_run
+        # monotonic start of the last sync; windows are sent to Jira as relative JQL, never as wall-clock times
+        self.synced_at = synced_at
+        self.rate = 0.0
+
+    def adjust(
+            self,
+            changes: int,
+            elapsed: float,
+            min_interval: float,
+            max_interval: float,
+            target_changes: int,
+            smoothing: float = 0.5
+    ) -> None:
+        # aim for `target_changes` per run from a smoothed change rate; a quiet run backs off exponentially
+        self.rate = smoothing * (changes / max(elapsed, 1.0)) + (1 - smoothing) * self.rate
+        if changes == 0:
+            interval = self.interval * 2
+        else:
+            interval = target_changes / self.rate if self.rate else max_interval
+        self.interval = min(max(interval, min_interval), max_interval)
+
+
+class Scheduler(object):
+    __slots__ = (
+        "client",
+        "session_maker",
+        "index",
+        "min_interval",
+        "max_interval",
+        "jitter",
+        "max_projects",
+        "target_changes",
+        "concurrency",
+        "batch_size",
+        "_schedules",
+    )
+
+    def __init__(
+            self,
+            client: JiraClient,
+            session_maker: sessionmaker,
+            index: KeyIndex,
+            min_interval: float = 60.0,
+            max_interval: float = 3600.0,
+            jitter: float = 0.1,
+            max_projects: int = 4,
+            target_changes: int = 20,
+            concurrency: int = 8,
+            batch_size: int = 100
+    ) -> None:
+        self.client = client
+        self.session_maker = session_maker
+        self.index = index
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.max_projects = max_projects
+        self.target_changes = target_changes
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self._schedules: dict[int, ProjectSchedule] = {}
+
+    def _refresh_projects(self, synced_at: float) -> None:
+        with self.session_maker() as session:  # type: Session
+            project_ids = set(session.scalars(statement=select(Project.id).filter(Project.is_active)).all())
+        for project_id in project_ids - self._schedules.keys():
+            self._schedules[project_id] = ProjectSchedule(
+                project_id=project_id,
+                interval=self.min_interval,
+                synced_at=synced_at,
+                # new projects start spread out instead of all hitting Jira on the first tick
+                next_run=time.monotonic() + self._with_jitter(self.min_interval)
+            )
+        for project_id in self._schedules.keys() - project_ids:
+            del self._schedules[project_id]
+
+    def _with_jitter(self, interval: float) -> float:
+        # spread projects that share an interval so their runs do not line up against the API
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _run_project(self, schedule: ProjectSchedule) -> tuple[int, float]:
+        started_at = time.monotonic()
+        window = started_at - schedule.synced_at
+        keys = list(search_issue_keys(
+            client=self.client,
+            batch_size=self.batch_size,
+            project_id=schedule.project_id,
+            # one extra minute so edits landing during the previous run are not missed by minute-precision JQL
+            since_minutes=math.ceil(window / 60) + 1
+        ))
+        if keys:
+            sync_issues(
+                client=self.client,
+                session_maker=self.session_maker,
+                keys=keys,
+                index=self.index,
+                # the Jira and DB pools are sized for `concurrency`, so concurrent projects share it
+                concurrency=max(self.concurrency // self.max_projects, 1),
+                batch_size=self.batch_size,
+                update_existing=True
+            )
+        schedule.synced_at = started_at
+        # a new or changed worklog bumps its issue's `updated`, so the key count covers both kinds of change
+        return len(keys), window
+
+    def _finish(self, schedule: ProjectSchedule, future: Future) -> None:
+        try:
+            changes, window = future.result()
+        except Exception as e:
+            print(f"project {schedule.project_id} sync failed: {e}")
+            schedule.next_run = time.monotonic() + self._with_jitter(schedule.interval)
+            return
+        schedule.adjust(
+            changes=changes,
+            elapsed=window,
+            min_interval=self.min_interval,
+            max_interval=self.max_interval,
+            target_changes=self.target_changes
+        )
+        schedule.next_run = time.monotonic() + self._with_jitter(schedule.interval)
+        print(f"project {schedule.project_id}: {changes} changes, next run in {schedule.interval:.0f}s")
+
+    def run_forever(self, since: date | None = None, refresh_interval: float = 600.0) -> None:
+        # the start date only sets how far back the first run looks; it is turned into an age right away
+        lookback = (datetime.now() - datetime.combine(since, datetime.min.time())).total_seconds() if since else None
+        synced_at = time.monotonic() - (lookback or self.max_interval)
+        running: dict[int, Future] = {}
+        refreshed_at = None
+        with ThreadPoolExecutor(max_workers=self.max_projects) as executor:
+            while True:
+                now = time.monotonic()
+                if refreshed_at is None or now - refreshed_at >= refresh_interval:
+                    try:
+                        if refreshed_at is not None:
+                            # startup already synced dimensions in the CLI
+                            refresh_dimensions(
+                                client=self.client,
+                                session_maker=self.session_maker,
+                                index=self.index,
+                                batch_size=self.batch_size
+                            )
+                        self._refresh_projects(synced_at=synced_at)
+                        print(f"Scheduling {len(self._schedules)} active projects")
+                    except Exception as e:
+                        # a brief DB or Jira outage must not kill the daemon; the next refresh tries again
+                        print(f"project refresh failed: {e}")
+                    refreshed_at = now
+                for project_id, future in list(running.items()):
+                    if future.done():
+                        del running[project_id]
+                        if project_id in self._schedules:
+                            self._finish(schedule=self._schedules[project_id], future=future)
+                due = sorted(
+                    (schedule for schedule in self._schedules.values()
+                     if schedule.project_id not in running and schedule.next_run <= now),
+                    key=lambda schedule: schedule.next_run
+                )
+                for schedule in due[:self.max_projects - len(running)]:
+                    running[schedule.project_id] = executor.submit(self._run_project, schedule)
+                time.sleep(TICK_SECONDS)
@@ -1,12 +1,21 @@
+from functools import lru_cache
 from pathlib import Path
 
 from pydantic import PostgresDsn, HttpUrl, EmailStr, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine
 from sqlalchemy.orm import sessionmaker
 
 from jira_client import JiraClient
 
+__all__ = [
+    "Settings",
+    "get_settings",
+    "get_engine",
+    "get_session_maker",
+    "get_jira_client",
+]
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -25,16 +34,77 @@ class Settings(BaseSettings):
     JIRA_DOMAIN: HttpUrl
     JIRA_EMAIL: EmailStr
     JIRA_TOKEN: SecretStr
+    JIRA_HTTP2: bool = False
+    JIRA_KEEPALIVE_EXPIRY: float = 30.0
+    JIRA_CONNECT_TIMEOUT: float = 10.0
+    JIRA_READ_TIMEOUT: float = 60.0
+
+    CONCURRENCY: int = 8
+    BATCH_SIZE: int = 100
+
+    # Redis is required for the sync to invalidate cached queries served by other processes
+    CACHE_URL: str | None = None
+    CACHE_TTL: int = 300
+    CACHE_LOCAL_TTL: int = 30
+    CACHE_SIZE: int = 4096
+
+    WEBHOOK_SECRET: SecretStr | None = None
+    WEBHOOK_WINDOW: float = 5.0
+
+    SCHEDULER_MIN_INTERVAL: float = 60.0
+    SCHEDULER_MAX_INTERVAL: float = 3600.0
+    SCHEDULER_JITTER: float = 0.1
+    SCHEDULER_MAX_PROJECTS: int = 4
+    SCHEDULER_TARGET_CHANGES: int = 20
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
 
 
-settings = Settings()
+@lru_cache
+def get_engine(concurrency: int | None = None) -> Engine:
+    settings = get_settings()
+    concurrency = concurrency or settings.CONCURRENCY
+    return create_engine(
+        url=settings.POSTGRES_URL.unicode_string(),
+        pool_size=concurrency,
+        max_overflow=concurrency,
+        pool_pre_ping=True
+    )
+
+
+@lru_cache
+def get_session_maker(concurrency: int | None = None) -> sessionmaker:
+    return sessionmaker(bind=get_engine(concurrency=concurrency))
+
+
+@lru_cache
+def get_jira_client(concurrency: int | None = None) -> JiraClient:
+    settings = get_settings()
+    return JiraClient(
+        base_url=settings.JIRA_DOMAIN.unicode_string(),
+        email=settings.JIRA_EMAIL,
+        token=settings.JIRA_TOKEN.get_secret_value(),
+        concurrency=concurrency or settings.CONCURRENCY,
+        http2=settings.JIRA_HTTP2,
+        keepalive_expiry=settings.JIRA_KEEPALIVE_EXPIRY,
+        connect_timeout=settings.JIRA_CONNECT_TIMEOUT,
+        read_timeout=settings.JIRA_READ_TIMEOUT
+    )
+
 
-engine = create_engine(url=settings.POSTGRES_URL.unicode_string(), pool_size=50, max_overflow=50)
-session_maker = sessionmaker(bind=engine)
+_LAZY_ATTRIBUTES = {
+    "settings": get_settings,
+    "engine": get_engine,
+    "session_maker": get_session_maker,
+    "jira_client": get_jira_client,
+}
 
 
-jira_client = JiraClient(
-    base_url=settings.JIRA_DOMAIN.unicode_string(),
-    email=settings.JIRA_EMAIL,
-    token=settings.JIRA_TOKEN.get_secret_value()
-)
+def __getattr__(name: str):
+    # keeps `from settings import session_maker, jira_client` working without building them on import
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
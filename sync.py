@@ -0,0 +1,647 @@
+import json
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, aliased, sessionmaker
+
+from archive import ArchiveReader, ArchiveWriter
+from dead_letter import record_dead_letter, resolve_dead_letters, iter_dead_letters
+from enums import DeadLetterStage
+from jira_client import JiraClient
+from key_index import KeyIndex
+from models import Issue, User, Worklog
+from queries import invalidate_issues, invalidate_user_days
+from utils import get_valid_status, change_to_valid_email
+
+__all__ = [
+    "data_from_json",
+    "keys_from_json",
+    "chunked",
+    "search_issue_keys",
+    "fetch_issues",
+    "fetch_worklogs",
+    "fetch_updated_worklogs",
+    "issue_values",
+    "worklog_values",
+    "write_issue",
+    "write_worklogs",
+    "sync_issue_chunk",
+    "sync_issues",
+    "sync_worklogs",
+    "sync_updated_worklogs",
+    "delete_worklogs",
+    "delete_issues",
+    "replay_archive",
+    "retry_dead_letters",
+    "add_users_in_db",
+]
+
+BULK_FETCH_LIMIT = 100
+ISSUE_FIELDS = [
+    "summary",
+    "issuetype",
+    "priority",
+    "assignee",
+    "status",
+    "created",
+    "updated",
+    "duedate",
+    "project",
+    "parent",
+]
+
+
+def data_from_json(file_name):
+    with open(file_name, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def keys_from_json(file_name) -> list[str]:
+    return [row.get("Key") for row in data_from_json(file_name) if row.get("Key")]
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def search_issue_keys(
+        client: JiraClient,
+        since: date | None = None,
+        batch_size: int = 100,
+        project_id: int | None = None,
+        since_minutes: int | None = None
+) -> Iterator[str]:
+    conditions = []
+    if project_id is not None:
+        conditions.append(f"project = {project_id}")
+    if since is not None:
+        conditions.append(f'updated >= "{since.strftime("%Y-%m-%d")}"')
+    if since_minutes is not None:
+        # relative offsets are resolved by Jira itself, so neither the host clock nor the profile timezone matters
+        conditions.append(f'updated >= "-{since_minutes}m"')
+    order_by = "ORDER BY updated ASC" if since is not None or since_minutes is not None else "ORDER BY created ASC"
+    jql = " AND ".join(conditions) + " " + order_by if conditions else order_by
+    params = {"jql": jql, "fields": "key", "maxResults": batch_size}
+    while True:
+        response = client.request(method="GET", url="/rest/api/3/search/jql", params=params)
+        response.raise_for_status()
+        data = response.json()
+        for issue in data.get("issues", []):
+            yield issue.get("key")
+        if data.get("isLast", True) or not data.get("nextPageToken"):
+            break
+        params["nextPageToken"] = data.get("nextPageToken")
+
+
+def fetch_issues(
+        client: JiraClient,
+        keys: list[str],
+        with_worklogs: bool = False,
+        archive: ArchiveWriter | None = None
+) -> tuple[list[dict], list[str], dict[str, Exception]]:
+    response = client.request(
+        method="POST",
+        url="/rest/api/3/issue/bulkfetch",
+        json={"issueIdsOrKeys": keys, "fields": ISSUE_FIELDS + ["worklog"] if with_worklogs else ISSUE_FIELDS}
+    )
+    response.raise_for_status()
+    data = response.json()
+    issues = [issue_data for issue_data in data.get("issues", []) if issue_data.get("fields")]
+    if archive is not None:
+        for issue_data in issues:
+            archive.write_issue(issue_data=issue_data)
+    # issueErrors lists ids that hit a retriable error or a payload limit, not missing issues
+    failed: dict[str, Exception] = {
+        str(error.get("id")): RuntimeError(error.get("errorMessage") or "bulkfetch error")
+        for error in data.get("issueErrors", []) if error.get("id")
+    }
+    returned = {issue_data.get("key") for issue_data in issues} | {str(issue_data.get("id")) for issue_data in issues}
+    not_found = []
+    for key in keys:
+        if key in returned or key in failed:
+            continue
+        # a single-issue GET follows moves, so a key bulkfetch did not echo back is only reported once Jira 404s it
+        response = client.request(method="GET", url=f"/rest/api/3/issue/{key}", params={"fields": "id"})
+        if response.status_code == 404:
+            not_found.append(key)
+        elif not response.is_success or str(response.json().get("id")) not in returned:
+            failed[key] = RuntimeError(f"{key} not returned by bulkfetch, lookup answered {response.status_code}")
+    return issues, not_found, failed
+
+
+def fetch_worklogs(client: JiraClient, key: str, archive: ArchiveWriter | None = None) -> list[dict] | None:
+    response = client.request(method="GET", url=f"/rest/api/3/issue/{key}/worklog")
+    response.raise_for_status()
+    worklogs = response.json().get("worklogs")
+    if archive is not None and worklogs:
+        archive.write_worklogs(worklogs=worklogs)
+    return worklogs
+
+
+def fetch_updated_worklogs(
+        client: JiraClient,
+        since: date,
+        batch_size: int = 1000,
+        archive: ArchiveWriter | None = None
+) -> Iterator[list[dict]]:
+    params = {"since": int(datetime.combine(since, datetime.min.time()).timestamp() * 1000)}
+    while True:
+        response = client.request(method="GET", url="/rest/api/3/worklog/updated", params=params)
+        response.raise_for_status()
+        data = response.json()
+        worklog_ids = [value.get("worklogId") for value in data.get("values", [])]
+        for ids in chunked(worklog_ids, min(batch_size, 1000)):
+            response = client.request(method="POST", url="/rest/api/3/worklog/list", json={"ids": ids})
+            response.raise_for_status()
+            worklogs = response.json()
+            if archive is not None:
+                archive.write_worklogs(worklogs=worklogs)
+            yield worklogs
+        if data.get("lastPage", True):
+            break
+        params["since"] = data.get("until")
+
+
+def get_parent_issue_id(issue_data: dict) -> int | None:
+    parent = (issue_data.get("fields") or {}).get("parent")
+    if parent and parent.get("id"):
+        return int(parent.get("id"))
+    return None
+
+
+def issue_values(issue_data: dict, index: KeyIndex) -> dict:
+    fields = issue_data.get("fields")
+    project_id = int(fields.get("project").get("id"))
+    if project_id not in index.project_ids:
+        raise LookupError(f"unknown project id: {project_id}")
+    return {
+        "id": int(issue_data.get("id")),
+        "name": fields.get("summary"),
+        "key": issue_data.get("key"),
+        "type": "TASK" if fields.get("issuetype").get("name").upper() in {"ЗАДАЧА", "TASK"} else "BUG",
+        "priority": fields.get("priority").get("name").upper(),
+        "developer_id": index.users.get(
+            change_to_valid_email(data={"author": fields.get("assignee")})
+        ) if fields.get("assignee") else None,
+        "status": get_valid_status(status=fields.get("status").get("name")),
+        "start_date": datetime.fromisoformat(fields.get("created")).date(),
+        "end_date": datetime.fromisoformat(fields.get("duedate")).date() if fields.get("duedate") else None,
+        "project_id": project_id,
+        "parent_issue_id": get_parent_issue_id(issue_data=issue_data)
+    }
+
+
+def worklog_values(worklog: dict, index: KeyIndex) -> dict | None:
+    email = change_to_valid_email(data=worklog)
+    if email is None or not worklog.get("timeSpentSeconds"):
+        return None
+    user_id = index.users.get(email)
+    if user_id is None:
+        raise LookupError(f"unknown user email: {email}")
+    return {
+        "id": int(worklog.get("id")),
+        "issue_id": int(worklog.get("issueId")),
+        "user_id": user_id,
+        "hour": timedelta(seconds=worklog.get("timeSpentSeconds")),
+        "date_created": datetime.fromisoformat(worklog.get("started")).date()
+    }
+
+
+def write_issue(session: Session, issue_data: dict, index: KeyIndex) -> bool:
+    try:
+        values = issue_values(issue_data=issue_data, index=index)
+        # upsert on id: rows other processes wrote and moved issues (new key, same id) land on the existing row
+        statement = insert(Issue).values(values)
+        old_issue = aliased(Issue)
+        developer_ids = session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Issue.id],
+                # re-derive every mapped column so transform rule changes reach existing rows
+                set_={name: statement.excluded[name] for name in values if name != "id"}
+            ).returning(
+                Issue.developer_id,
+                # same-statement subqueries read the pre-upsert snapshot, so this is the replaced developer
+                select(old_issue.developer_id).where(old_issue.id == values["id"]).scalar_subquery()
+            )
+        ).one()
+        session.commit()
+        print("Issue upserted successful!")
+    except Exception as e:
+        record_dead_letter(
+            session=session,
+            stage=DeadLetterStage.ISSUE,
+            key=issue_data.get("key"),
+            payload=issue_data,
+            error=e
+        )
+        return False
+    invalidate_issues(issue_ids=[values["id"]], developer_ids=developer_ids)
+    return True
+
+
+def _execute_worklog_statements(session: Session, statements: list) -> set[tuple[int, date]]:
+    # every statement returns (user_id, day, ...) so the cached hours of exactly those days can be dropped
+    user_days = set()
+    for statement in statements:
+        for row in session.execute(statement=statement):
+            user_days.update((row[0], day) for day in row[1:])
+    session.commit()
+    return user_days
+
+
+def _write_worklog_rows(session: Session, rows: list[tuple[dict, dict]], statement_factory) -> set[str]:
+    # one statement for the whole batch; on failure fall back row by row so one bad worklog does not sink the rest
+    try:
+        user_days = _execute_worklog_statements(
+            session=session,
+            statements=statement_factory([values for _, values in rows])
+        )
+        invalidate_user_days(user_days=user_days)
+        return set()
+    except Exception:
+        session.rollback()
+    failed = set()
+    for worklog, values in rows:
+        try:
+            user_days = _execute_worklog_statements(session=session, statements=statement_factory([values]))
+            invalidate_user_days(user_days=user_days)
+        except Exception as e:
+            record_dead_letter(
+                session=session,
+                stage=DeadLetterStage.WORKLOG,
+                key=str(worklog.get("id")),
+                payload=worklog,
+                error=e
+            )
+            failed.add(str(worklog.get("id")))
+    return failed
+
+
+def _insert_worklogs(values_list: list[dict]) -> list:
+    # rows the startup index missed already exist, so they are upserted; the select returns their current days
+    # first because a conflicting row may move to another date
+    statement = insert(Worklog).values(values_list)
+    return [
+        select(Worklog.user_id, Worklog.date_created).where(Worklog.id.in_([values["id"] for values in values_list])),
+        statement.on_conflict_do_update(
+            index_elements=[Worklog.id],
+            set_={"hour": statement.excluded.hour, "date_created": statement.excluded.date_created},
+            where=(Worklog.hour != statement.excluded.hour) | (Worklog.date_created != statement.excluded.date_created)
+        ).returning(Worklog.user_id, Worklog.date_created)
+    ]
+
+
+def _update_worklogs(values_list: list[dict]) -> list:
+    old_worklog = aliased(Worklog)
+    return [
+        update(Worklog).values(
+            hour=values["hour"],
+            date_created=values["date_created"]
+        ).where(
+            Worklog.id == values["id"],
+            old_worklog.id == Worklog.id,
+            (Worklog.hour != values["hour"]) | (Worklog.date_created != values["date_created"])
+        ).returning(Worklog.user_id, Worklog.date_created, old_worklog.date_created) for values in values_list
+    ]
+
+
+def write_worklogs(
+        session: Session,
+        worklogs: Iterable[dict],
+        index: KeyIndex,
+        batch_size: int = 100,
+        update_existing: bool = False
+) -> set[str]:
+    new_rows, changed_rows, failed = [], [], set()
+    for worklog in worklogs:
+        try:
+            values = worklog_values(worklog=worklog, index=index)
+        except Exception as e:
+            record_dead_letter(
+                session=session,
+                stage=DeadLetterStage.WORKLOG,
+                key=str(worklog.get("id")),
+                payload=worklog,
+                error=e
+            )
+            failed.add(str(worklog.get("id")))
+            continue
+        if values is None:
+            continue
+        if values["id"] not in index.worklog_ids:
+            new_rows.append((worklog, values))
+        elif update_existing:
+            changed_rows.append((worklog, values))
+        else:
+            print(f"worklog id: {values['id']} already exists")
+    for rows in chunked(new_rows, batch_size):
+        batch_failed = _write_worklog_rows(session=session, rows=rows, statement_factory=_insert_worklogs)
+        index.worklog_ids.update(values["id"] for _, values in rows if str(values["id"]) not in batch_failed)
+        failed |= batch_failed
+    for rows in chunked(changed_rows, batch_size):
+        failed |= _write_worklog_rows(session=session, rows=rows, statement_factory=_update_worklogs)
+    if new_rows:
+        print(f"worklogs inserted successful: {len(new_rows) - len(failed)}")
+    return failed
+
+
+def _issue_worklogs(client: JiraClient, issue_data: dict, archive: ArchiveWriter | None = None) -> list[dict] | None:
+    # bulkfetch embeds the first page of worklogs; only go back to Jira when the issue has more
+    worklog_field = issue_data.get("fields").get("worklog") or {}
+    worklogs = worklog_field.get("worklogs")
+    if worklogs is not None and worklog_field.get("total", 0) <= len(worklogs):
+        if archive is not None and worklogs:
+            archive.write_worklogs(worklogs=worklogs)
+        return worklogs
+    return fetch_worklogs(client=client, key=issue_data.get("key"), archive=archive)
+
+
+def sync_issue_chunk(
+        client: JiraClient,
+        session_maker: sessionmaker,
+        keys: list[str],
+        index: KeyIndex,
+        with_worklogs: bool = True,
+        batch_size: int = 100,
+        archive: ArchiveWriter | None = None,
+        update_existing: bool = False
+) -> tuple[list[str], list[str]]:
+    # returns (keys Jira does not know, keys dead-lettered for a later FETCH retry)
+    issues, not_found, failed = fetch_issues(client=client, keys=keys, with_worklogs=with_worklogs, archive=archive)
+    with session_maker() as session:  # type: Session
+        for key, error in failed.items():
+            record_dead_letter(session=session, stage=DeadLetterStage.FETCH, key=key, payload={"key": key}, error=error)
+        for issue_data in issues:
+            write_issue(session=session, issue_data=issue_data, index=index)
+            if with_worklogs:
+                # one issue's worklog fetch failing (429, 5xx) must not drop or re-queue the rest of the chunk
+                try:
+                    worklogs = _issue_worklogs(client=client, issue_data=issue_data, archive=archive)
+                except Exception as e:
+                    key = issue_data.get("key")
+                    record_dead_letter(
+                        session=session,
+                        stage=DeadLetterStage.FETCH,
+                        key=key,
+                        payload={"key": key},
+                        error=e
+                    )
+                    failed[key] = e
+                    continue
+                if worklogs:
+                    write_worklogs(
+                        session=session,
+                        worklogs=worklogs,
+                        index=index,
+                        batch_size=batch_size,
+                        update_existing=update_existing
+                    )
+    return not_found, list(failed)
+
+
+def _record_fetch_failures(session_maker: sessionmaker, keys: list[str], error: Exception) -> None:
+    with session_maker() as session:  # type: Session
+        for key in keys:
+            record_dead_letter(session=session, stage=DeadLetterStage.FETCH, key=key, payload={"key": key}, error=error)
+
+
+def sync_issues(
+        client: JiraClient,
+        session_maker: sessionmaker,
+        keys: Iterable[str],
+        index: KeyIndex,
+        concurrency: int = 8,
+        batch_size: int = 100,
+        with_worklogs: bool = True,
+        archive: ArchiveWriter | None = None,
+        update_existing: bool = False
+) -> list[str]:
+    processed = 0
+    not_found = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for wave in chunked(chunked(keys, min(batch_size, BULK_FETCH_LIMIT)), concurrency):
+            futures = [
+                executor.submit(
+                    sync_issue_chunk,
+                    client,
+                    session_maker,
+                    keys_chunk,
+                    index,
+                    with_worklogs,
+                    batch_size,
+                    archive,
+                    update_existing
+                )
+                for keys_chunk in wave
+            ]
+            for keys_chunk, future in zip(wave, futures):
+                try:
+                    not_found.extend(future.result()[0])
+                except Exception as e:
+                    _record_fetch_failures(session_maker=session_maker, keys=keys_chunk, error=e)
+            processed += sum(len(keys_chunk) for keys_chunk in wave)
+            print(f"Processed issues: {processed}")
+    if not_found:
+        print(f"Issues not found: {len(not_found)}")
+    return not_found
+
+
+def _sync_issue_worklogs(
+        client: JiraClient,
+        session_maker: sessionmaker,
+        key: str,
+        index: KeyIndex,
+        batch_size: int,
+        archive: ArchiveWriter | None = None
+) -> None:
+    worklogs = fetch_worklogs(client=client, key=key, archive=archive)
+    if not worklogs:
+        return
+    with session_maker() as session:  # type: Session
+        write_worklogs(
+            session=session,
+            worklogs=worklogs,
+            index=index,
+            batch_size=batch_size,
+            update_existing=True
+        )
+
+
+def sync_worklogs(
+        client: JiraClient,
+        session_maker: sessionmaker,
+        keys: Iterable[str],
+        index: KeyIndex,
+        concurrency: int = 8,
+        batch_size: int = 100,
+        archive: ArchiveWriter | None = None
+) -> None:
+    processed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for keys_chunk in chunked(keys, batch_size):
+            futures = [
+                executor.submit(_sync_issue_worklogs, client, session_maker, key, index, batch_size, archive)
+                for key in keys_chunk
+            ]
+            for key, future in zip(keys_chunk, futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    _record_fetch_failures(session_maker=session_maker, keys=[key], error=e)
+            processed += len(keys_chunk)
+            print(f"Processed issues: {processed}")
+
+
+def sync_updated_worklogs(
+        client: JiraClient,
+        session_maker: sessionmaker,
+        since: date,
+        index: KeyIndex,
+        batch_size: int = 1000,
+        archive: ArchiveWriter | None = None
+) -> None:
+    for worklogs in fetch_updated_worklogs(client=client, since=since, batch_size=batch_size, archive=archive):
+        with session_maker() as session:  # type: Session
+            write_worklogs(
+                session=session,
+                worklogs=worklogs,
+                index=index,
+                batch_size=batch_size,
+                update_existing=True
+            )
+        print(f"Processed worklogs: {len(worklogs)}")
+
+
+def delete_worklogs(session_maker: sessionmaker, worklog_ids: list[int], index: KeyIndex) -> None:
+    with session_maker() as session:  # type: Session
+        try:
+            user_days = _execute_worklog_statements(
+                session=session,
+                statements=[
+                    delete(Worklog).where(Worklog.id.in_(worklog_ids)).returning(Worklog.user_id, Worklog.date_created)
+                ]
+            )
+            invalidate_user_days(user_days=user_days)
+            for worklog_id in worklog_ids:
+                index.worklog_ids.discard(worklog_id)
+            print(f"worklogs deleted successful: {len(worklog_ids)}")
+        except Exception as e:
+            session.rollback()
+            print(e)
+
+
+def delete_issues(session_maker: sessionmaker, issue_ids: list[int], index: KeyIndex) -> None:
+    with session_maker() as session:  # type: Session
+        try:
+            # Jira drops the worklogs with the issue, and subtasks lose a parent the RESTRICT key would keep alive
+            session.execute(update(Issue).where(Issue.parent_issue_id.in_(issue_ids)).values(parent_issue_id=None))
+            worklogs = session.execute(
+                delete(Worklog).where(Worklog.issue_id.in_(issue_ids)).returning(
+                    Worklog.id,
+                    Worklog.user_id,
+                    Worklog.date_created
+                )
+            ).all()
+            developer_ids = session.scalars(
+                delete(Issue).where(Issue.id.in_(issue_ids)).returning(Issue.developer_id)
+            ).all()
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(e)
+            return
+    for worklog_id, _, _ in worklogs:
+        index.worklog_ids.discard(worklog_id)
+    invalidate_user_days(user_days={(user_id, day) for _, user_id, day in worklogs})
+    invalidate_issues(issue_ids=issue_ids, developer_ids=developer_ids)
+    print(f"issues deleted successful: {len(developer_ids)}")
+
+
+def replay_archive(session_maker: sessionmaker, path: str, index: KeyIndex, batch_size: int = 100) -> None:
+    reader = ArchiveReader(path=path)
+    replayed = 0
+    for issues in chunked(reader.latest(kind="issue"), batch_size):
+        with session_maker() as session:  # type: Session
+            for issue_data in issues:
+                write_issue(session=session, issue_data=issue_data, index=index)
+        replayed += len(issues)
+        print(f"Replayed issues: {replayed}")
+
+    replayed = 0
+    for worklogs in chunked(reader.latest(kind="worklog"), batch_size):
+        with session_maker() as session:  # type: Session
+            write_worklogs(
+                session=session,
+                worklogs=worklogs,
+                index=index,
+                batch_size=batch_size,
+                update_existing=True
+            )
+        replayed += len(worklogs)
+        print(f"Replayed worklogs: {replayed}")
+
+
+def retry_dead_letters(
+        client: JiraClient,
+        session_maker: sessionmaker,
+        index: KeyIndex,
+        stages: list[DeadLetterStage] | None = None,
+        batch_size: int = 100
+) -> None:
+    # fetch failures first so their issues exist before issue and worklog retries need them as parents
+    for stage in stages or list(DeadLetterStage):
+        resolved_count = 0
+        not_found = []
+        with session_maker() as session:  # type: Session
+            stage_batch_size = min(batch_size, BULK_FETCH_LIMIT) if stage == DeadLetterStage.FETCH else batch_size
+            for dead_letters in iter_dead_letters(session=session, stage=stage, batch_size=stage_batch_size):
+                if stage == DeadLetterStage.FETCH:
+                    try:
+                        chunk_not_found, chunk_failed = sync_issue_chunk(
+                            client=client,
+                            session_maker=session_maker,
+                            keys=[dead_letter.key for dead_letter in dead_letters],
+                            index=index,
+                            batch_size=batch_size
+                        )
+                    except Exception as e:
+                        print(e)
+                        continue
+                    # keys Jira still does not know stay dead-lettered so they remain visible for cleanup, and
+                    # keys that failed again were just re-recorded with a bumped attempt count
+                    not_found.extend(chunk_not_found)
+                    unresolved = set(chunk_not_found) | set(chunk_failed)
+                    resolved = [dead_letter.id for dead_letter in dead_letters if dead_letter.key not in unresolved]
+                elif stage == DeadLetterStage.ISSUE:
+                    resolved = [
+                        dead_letter.id for dead_letter in dead_letters
+                        if write_issue(session=session, issue_data=dead_letter.payload, index=index)
+                    ]
+                else:
+                    failed = write_worklogs(
+                        session=session,
+                        worklogs=[dead_letter.payload for dead_letter in dead_letters],
+                        index=index,
+                        batch_size=batch_size,
+                        update_existing=True
+                    )
+                    resolved = [dead_letter.id for dead_letter in dead_letters if dead_letter.key not in failed]
+                resolve_dead_letters(session=session, ids=resolved)
+                resolved_count += len(resolved)
+        print(f"Dead letters resolved for {stage}: {resolved_count}")
+        if not_found:
+            print(f"Dead letters still not found in Jira: {len(not_found)} {not_found}")
+
+
+def add_users_in_db(session_maker: sessionmaker, users: list[dict], batch_size: int = 100) -> None:
+    with session_maker() as session:  # type: Session
+        for batch in chunked(users, batch_size):
+            session.execute(insert(User).values(batch))
+        session.commit()
+        print(f"Users added successful: {len(users)}")
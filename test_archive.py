@@ -0,0 +1,56 @@
+from archive import ArchiveReader, ArchiveWriter
+
+
+def _write_issues(path, start: int, count: int, member_size: int = 1000) -> None:
+    with ArchiveWriter(path=path, member_size=member_size) as archive:
+        for number in range(start, start + count):
+            archive.write(
+                kind="issue",
+                key=f"PROJ-{number}",
+                updated="2024-01-02T10:00:00.000+0300",
+                payload={"key": f"PROJ-{number}"}
+            )
+
+
+def _keys(path) -> list[str]:
+    return [payload["key"] for payload in ArchiveReader(path=path).latest(kind="issue")]
+
+
+def test_reads_every_member(tmp_path):
+    path = tmp_path / "archive.jsonl.gz"
+    _write_issues(path=path, start=0, count=25, member_size=10)
+    _write_issues(path=path, start=25, count=5, member_size=10)
+
+    assert _keys(path) == [f"PROJ-{number}" for number in range(30)]
+
+
+def test_keeps_latest_update_across_offsets(tmp_path):
+    path = tmp_path / "archive.jsonl.gz"
+    with ArchiveWriter(path=path) as archive:
+        archive.write(kind="issue", key="PROJ-1", updated="2024-01-02T10:00:00.000+0300", payload={"v": 1})
+        archive.write(kind="issue", key="PROJ-1", updated="2024-01-02T08:30:00.000+0000", payload={"v": 2})
+
+    assert list(ArchiveReader(path=path).latest(kind="issue")) == [{"v": 2}]
+
+
+def test_truncated_tail_is_skipped(tmp_path, capsys):
+    path = tmp_path / "archive.jsonl.gz"
+    _write_issues(path=path, start=0, count=20, member_size=10)
+    _write_issues(path=path, start=20, count=10, member_size=10)
+    data = path.read_bytes()
+    path.write_bytes(data[:-15])
+
+    keys = _keys(path)
+
+    assert keys[:20] == [f"PROJ-{number}" for number in range(20)]
+    assert "truncated gzip member" in capsys.readouterr().out
+
+
+def test_runs_appended_after_truncated_member_are_read(tmp_path):
+    path = tmp_path / "archive.jsonl.gz"
+    _write_issues(path=path, start=0, count=10)
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    _write_issues(path=path, start=100, count=10)
+
+    assert _keys(path)[-10:] == [f"PROJ-{number}" for number in range(100, 110)]
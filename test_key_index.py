@@ -0,0 +1,46 @@
+from key_index import IdBitmap
+
+
+def test_contains_added_ids():
+    bitmap = IdBitmap(base=1000)
+    bitmap.update([1000, 1007, 1008, 1500])
+
+    assert all(item in bitmap for item in (1000, 1007, 1008, 1500))
+    assert 1001 not in bitmap
+    assert 999 not in bitmap
+    assert len(bitmap) == 4
+
+
+def test_ids_below_base_are_kept_as_outliers():
+    bitmap = IdBitmap(base=1000)
+    bitmap.add(5)
+
+    assert 5 in bitmap
+    assert len(bitmap) == 1
+    assert bitmap.nbytes == 0
+
+
+def test_grows_past_current_size():
+    bitmap = IdBitmap()
+    bitmap.add(3)
+    size = bitmap.nbytes
+    bitmap.add(1_000_000)
+
+    assert bitmap.nbytes > size
+    assert 3 in bitmap
+    assert 1_000_000 in bitmap
+    assert 999_999 not in bitmap
+    assert 2_000_000 not in bitmap
+
+
+def test_discard():
+    bitmap = IdBitmap(base=100)
+    bitmap.update([50, 100, 101])
+    bitmap.discard(50)
+    bitmap.discard(100)
+    bitmap.discard(10_000)
+
+    assert 50 not in bitmap
+    assert 100 not in bitmap
+    assert 101 in bitmap
+    assert len(bitmap) == 1
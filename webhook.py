@@ -0,0 +1,238 @@
+import hashlib
+import hmac
+import ipaddress
+import json
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Lock, Thread
+
+from sqlalchemy.orm import sessionmaker
+
+from dimensions import refresh_dimensions
+from jira_client import JiraClient
+from key_index import KeyIndex
+from sync import delete_issues, delete_worklogs, sync_issues
+
+__all__ = ["EventCoalescer", "WebhookServer", "serve"]
+
+ISSUE_EVENTS = {"jira:issue_created", "jira:issue_updated"}
+WORKLOG_EVENTS = {"worklog_created", "worklog_updated"}
+WORKLOG_DELETED_EVENTS = {"worklog_deleted"}
+ISSUE_DELETED_EVENTS = {"jira:issue_deleted"}
+DIMENSIONS_REFRESH_SECONDS = 600.0
+
+
+class EventCoalescer(object):
+    __slots__ = ("_issues", "_deleted_issues", "_deleted_worklogs", "_lock")
+
+    def __init__(self) -> None:
+        # a burst of edits to one issue collapses into a single entry until the next flush; issue and worklog
+        # events are both keyed by issue id, since worklog payloads carry no issue key
+        self._issues: set[str] = set()
+        self._deleted_issues: set[int] = set()
+        self._deleted_worklogs: dict[int, int] = {}
+        self._lock = Lock()
+
+    def add_issue(self, issue_id: str) -> None:
+        with self._lock:
+            if int(issue_id) not in self._deleted_issues:
+                self._issues.add(issue_id)
+
+    def delete_issue(self, issue_id: int) -> None:
+        with self._lock:
+            self._deleted_issues.add(issue_id)
+            self._issues.discard(str(issue_id))
+
+    def delete_worklog(self, worklog_id: int, issue_id: int) -> None:
+        with self._lock:
+            self._deleted_worklogs[worklog_id] = issue_id
+
+    def drain(self) -> tuple[list[str], list[int], dict[int, int]]:
+        with self._lock:
+            issues, self._issues = list(self._issues), set()
+            deleted_issues, self._deleted_issues = list(self._deleted_issues), set()
+            deleted_worklogs, self._deleted_worklogs = self._deleted_worklogs, {}
+        return issues, deleted_issues, deleted_worklogs
+
+    def handle(self, event: dict) -> bool:
+        event_name = event.get("webhookEvent")
+        if event_name in ISSUE_EVENTS and event.get("issue"):
+            self.add_issue(str(event.get("issue").get("id")))
+        elif event_name in ISSUE_DELETED_EVENTS and event.get("issue"):
+            self.delete_issue(int(event.get("issue").get("id")))
+        elif event_name in WORKLOG_EVENTS and event.get("worklog"):
+            self.add_issue(str(event.get("worklog").get("issueId")))
+        elif event_name in WORKLOG_DELETED_EVENTS and event.get("worklog"):
+            self.delete_worklog(
+                worklog_id=int(event.get("worklog").get("id")),
+                issue_id=int(event.get("worklog").get("issueId"))
+            )
+        else:
+            return False
+        return True
+
+
+class WebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], coalescer: EventCoalescer, secret: str | None = None) -> None:
+        super().__init__(address, WebhookHandler)
+        self.coalescer = coalescer
+        self.secret = secret
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    server: WebhookServer
+
+    def _verify(self, body: bytes) -> bool:
+        if not self.server.secret:
+            return True
+        signature = self.headers.get("X-Hub-Signature", "")
+        expected = "sha256=" + hmac.new(self.server.secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature, expected)
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self._verify(body=body):
+            self.send_response(HTTPStatus.UNAUTHORIZED)
+            self.end_headers()
+            return
+        try:
+            event = json.loads(body)
+        except ValueError:
+            self.send_response(HTTPStatus.BAD_REQUEST)
+            self.end_headers()
+            return
+        self.server.coalescer.handle(event=event)
+        # acknowledge right away, the write happens on the next flush
+        self.send_response(HTTPStatus.ACCEPTED)
+        self.end_headers()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def _gone_in_jira(client: JiraClient, url: str) -> bool:
+    # a delete event only names ids, so rows are dropped once Jira itself no longer serves them
+    try:
+        return client.request(method="GET", url=url).status_code == 404
+    except Exception as e:
+        print(e)
+        return False
+
+
+def _flush(
+        coalescer: EventCoalescer,
+        client: JiraClient,
+        session_maker: sessionmaker,
+        index: KeyIndex,
+        workers: int,
+        batch_size: int
+) -> None:
+    issues, deleted_issues, deleted_worklogs = coalescer.drain()
+    deleted_worklogs = [
+        worklog_id for worklog_id, issue_id in deleted_worklogs.items()
+        if _gone_in_jira(client=client, url=f"/rest/api/3/issue/{issue_id}/worklog/{worklog_id}")
+    ]
+    if deleted_worklogs:
+        delete_worklogs(session_maker=session_maker, worklog_ids=deleted_worklogs, index=index)
+    confirmed_issues = []
+    for issue_id in deleted_issues:
+        if _gone_in_jira(client=client, url=f"/rest/api/3/issue/{issue_id}"):
+            confirmed_issues.append(issue_id)
+        else:
+            # still in Jira, so the delete event dropped updates queued for it in this window
+            issues.append(str(issue_id))
+    if confirmed_issues:
+        delete_issues(session_maker=session_maker, issue_ids=confirmed_issues, index=index)
+    if issues:
+        sync_issues(
+            client=client,
+            session_maker=session_maker,
+            keys=issues,
+            index=index,
+            concurrency=workers,
+            batch_size=batch_size,
+            update_existing=True
+        )
+
+
+def _flush_loop(
+        coalescer: EventCoalescer,
+        stop: Event,
+        client: JiraClient,
+        session_maker: sessionmaker,
+        index: KeyIndex,
+        window: float,
+        workers: int,
+        batch_size: int
+) -> None:
+    refreshed_at = time.monotonic()
+    while not stop.wait(timeout=window):
+        if time.monotonic() - refreshed_at >= DIMENSIONS_REFRESH_SECONDS:
+            # startup already synced dimensions in the CLI
+            try:
+                refresh_dimensions(client=client, session_maker=session_maker, index=index, batch_size=batch_size)
+            except Exception as e:
+                print(f"dimensions refresh failed: {e}")
+            refreshed_at = time.monotonic()
+        _flush(
+            coalescer=coalescer,
+            client=client,
+            session_maker=session_maker,
+            index=index,
+            workers=workers,
+            batch_size=batch_size
+        )
+    # the server is closed before `stop` is set, so this last drain sees every acknowledged event
+    _flush(
+        coalescer=coalescer,
+        client=client,
+        session_maker=session_maker,
+        index=index,
+        workers=workers,
+        batch_size=batch_size
+    )
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve(
+        client: JiraClient,
+        session_maker: sessionmaker,
+        index: KeyIndex,
+        host: str,
+        port: int,
+        window: float = 5.0,
+        workers: int = 1,
+        batch_size: int = 100,
+        secret: str | None = None
+) -> None:
+    if not secret and not _is_loopback(host=host):
+        raise ValueError(f"WEBHOOK_SECRET is required to accept webhooks on {host}")
+    coalescer = EventCoalescer()
+    stop = Event()
+    flusher = Thread(
+        target=_flush_loop,
+        args=(coalescer, stop, client, session_maker, index, window, workers, batch_size),
+        daemon=True
+    )
+    flusher.start()
+    server = WebhookServer(address=(host, port), coalescer=coalescer, secret=secret)
+    print(f"Webhook receiver listening on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        stop.set()
+        flusher.join()